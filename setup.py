@@ -0,0 +1,14 @@
+"""setup.py
+Install the sudoku package. The compiled search kernel is optional, when it cannot be built the
+pure Python search is used instead.
+"""
+from setuptools import setup, Extension
+
+setup(
+    name="sudoku_solver",
+    version="0.1.0",
+    packages=["sudoku"],
+    ext_modules=[
+        Extension("sudoku._kernel", sources=["sudoku/_kernel.c"], optional=True),
+    ],
+)
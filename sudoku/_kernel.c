@@ -0,0 +1,349 @@
+/* _kernel.c
+ * Optional compiled version of the search in solver.py. It works on the same flat byte grid as
+ * Grid, keeps the used values of every row, column and block as bitmasks, and branches on the
+ * empty cell with the fewest candidates, in the same order as the pure Python search so both
+ * give identical results.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#define MAX_BOX 5
+#define MAX_SIZE (MAX_BOX * MAX_BOX)
+#define MAX_CELLS (MAX_SIZE * MAX_SIZE)
+#define CHECK_INTERVAL 256
+
+typedef struct {
+    int size;
+    int cell_count;
+    unsigned int full;
+    unsigned char row_of[MAX_CELLS];
+    unsigned char column_of[MAX_CELLS];
+    unsigned char block_of[MAX_CELLS];
+    unsigned int rows[MAX_SIZE];
+    unsigned int columns[MAX_SIZE];
+    unsigned int blocks[MAX_SIZE];
+    unsigned char cells[MAX_CELLS];
+    /* The cell chosen and the values left to try at every depth of the search. */
+    int chosen[MAX_CELLS];
+    unsigned int remaining[MAX_CELLS];
+    int depth;
+    unsigned long nodes;
+} Search;
+
+static int
+count_bits(unsigned int mask)
+{
+    int count = 0;
+    while (mask) {
+        mask &= mask - 1;
+        count++;
+    }
+    return count;
+}
+
+static int
+lowest_value(unsigned int mask)
+{
+    int value = 1;
+    while (!(mask & 1u)) {
+        mask >>= 1;
+        value++;
+    }
+    return value;
+}
+
+static void
+place(Search *search, int index, int value)
+{
+    unsigned int bit = 1u << (value - 1);
+    search->cells[index] = (unsigned char)value;
+    search->rows[search->row_of[index]] |= bit;
+    search->columns[search->column_of[index]] |= bit;
+    search->blocks[search->block_of[index]] |= bit;
+}
+
+static void
+unplace(Search *search, int index)
+{
+    unsigned int bit = ~(1u << (search->cells[index] - 1));
+    search->rows[search->row_of[index]] &= bit;
+    search->columns[search->column_of[index]] &= bit;
+    search->blocks[search->block_of[index]] &= bit;
+    search->cells[index] = 0;
+}
+
+static unsigned int
+candidates(Search *search, int index)
+{
+    return search->full & ~(search->rows[search->row_of[index]]
+                            | search->columns[search->column_of[index]]
+                            | search->blocks[search->block_of[index]]);
+}
+
+/* Choose the empty cell with the fewest candidates, -1 if the grid is full. */
+static int
+choose(Search *search, unsigned int *mask)
+{
+    int best = -1;
+    int best_count = MAX_SIZE + 1;
+    for (int index = 0; index < search->cell_count; index++) {
+        if (search->cells[index]) {
+            continue;
+        }
+        unsigned int current = candidates(search, index);
+        int count = count_bits(current);
+        if (count < best_count) {
+            best = index;
+            best_count = count;
+            *mask = current;
+            if (count <= 1) {
+                break;
+            }
+        }
+    }
+    return best;
+}
+
+/* Load the grid, returns 0 when a value is repeated or out of range. */
+static int
+load(Search *search, int box, const unsigned char *cells)
+{
+    search->size = box * box;
+    search->cell_count = search->size * search->size;
+    search->full = (1u << search->size) - 1;
+    memset(search->rows, 0, sizeof(search->rows));
+    memset(search->columns, 0, sizeof(search->columns));
+    memset(search->blocks, 0, sizeof(search->blocks));
+    for (int index = 0; index < search->cell_count; index++) {
+        int row = index / search->size;
+        int column = index % search->size;
+        search->row_of[index] = (unsigned char)row;
+        search->column_of[index] = (unsigned char)column;
+        search->block_of[index] = (unsigned char)(row / box * box + column / box);
+        search->cells[index] = 0;
+    }
+    for (int index = 0; index < search->cell_count; index++) {
+        int value = cells[index];
+        if (!value) {
+            continue;
+        }
+        if (value > search->size || !(candidates(search, index) & (1u << (value - 1)))) {
+            return 0;
+        }
+        place(search, index, value);
+    }
+    return 1;
+}
+
+static PyObject *
+to_bytes(Search *search)
+{
+    return PyBytes_FromStringAndSize((const char *)search->cells, search->cell_count);
+}
+
+/* Append the grids that were not searched yet: the current grid, then the values left to try
+ * at every depth from the deepest to the shallowest. This undoes the search. */
+static int
+give_back(Search *search, int depth, PyObject *remaining)
+{
+    PyObject *grid = to_bytes(search);
+    if (grid == NULL || PyList_Append(remaining, grid) < 0) {
+        Py_XDECREF(grid);
+        return -1;
+    }
+    Py_DECREF(grid);
+    while (depth > 0) {
+        depth--;
+        int index = search->chosen[depth];
+        unplace(search, index);
+        unsigned int mask = search->remaining[depth];
+        while (mask) {
+            place(search, index, lowest_value(mask));
+            mask &= mask - 1;
+            grid = to_bytes(search);
+            unplace(search, index);
+            if (grid == NULL || PyList_Append(remaining, grid) < 0) {
+                Py_XDECREF(grid);
+                return -1;
+            }
+            Py_DECREF(grid);
+        }
+    }
+    return 0;
+}
+
+/* Try the next value at the deepest depth that has one left, unplacing the values on the way.
+ * Returns the new depth, or -1 once every value has been tried. */
+static int
+backtrack(Search *search, int depth)
+{
+    while (depth > 0) {
+        int index = search->chosen[depth - 1];
+        unsigned int mask = search->remaining[depth - 1];
+        unplace(search, index);
+        if (mask) {
+            place(search, index, lowest_value(mask));
+            search->remaining[depth - 1] = mask & (mask - 1);
+            return depth;
+        }
+        depth--;
+    }
+    return -1;
+}
+
+/* Run the search, counting nodes on from search->nodes so check keeps the same schedule across
+ * calls. Returns 1 when check stopped it, 0 when it finished and -1 on error. The GIL must be
+ * held when check is not NULL. */
+static int
+run(Search *search, long limit, PyObject *check, long *count, unsigned char *first)
+{
+    int depth = 0;
+    for (;;) {
+        search->nodes++;
+        if (check != NULL && search->nodes % CHECK_INTERVAL == 0) {
+            PyObject *result = PyObject_CallNoArgs(check);
+            if (result == NULL) {
+                return -1;
+            }
+            int stop = PyObject_IsTrue(result);
+            Py_DECREF(result);
+            if (stop < 0) {
+                return -1;
+            }
+            if (stop) {
+                search->depth = depth;
+                return 1;
+            }
+        }
+        unsigned int mask = 0;
+        int index = choose(search, &mask);
+        if (index < 0) {
+            if (*count == 0) {
+                memcpy(first, search->cells, search->cell_count);
+            }
+            (*count)++;
+            if (*count >= limit) {
+                return 0;
+            }
+        }
+        else if (mask) {
+            search->chosen[depth] = index;
+            place(search, index, lowest_value(mask));
+            search->remaining[depth] = mask & (mask - 1);
+            depth++;
+            continue;
+        }
+        depth = backtrack(search, depth);
+        if (depth < 0) {
+            return 0;
+        }
+    }
+}
+
+PyDoc_STRVAR(search_doc,
+"search(cells, box, limit=1, check=None, nodes=0)\n"
+"--\n"
+"\n"
+"Depth first search the flat byte grid for solutions. check is called every CHECK_INTERVAL\n"
+"nodes, counting on from nodes, the nodes already searched by earlier calls.\n"
+"\n"
+"Return the number of solutions found, the first solution as bytes or None, a list of the\n"
+"grids as bytes that were not searched yet, which is only non empty when check stopped the\n"
+"search, and the number of nodes searched by this call.");
+
+static PyObject *
+kernel_search(PyObject *module, PyObject *args, PyObject *kwargs)
+{
+    static char *keywords[] = {"cells", "box", "limit", "check", "nodes", NULL};
+    Py_buffer cells;
+    int box;
+    long limit = 1;
+    PyObject *check = Py_None;
+    unsigned long start = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*i|lOk:search", keywords,
+                                     &cells, &box, &limit, &check, &start)) {
+        return NULL;
+    }
+    if (box < 1 || box > MAX_BOX || cells.len != (Py_ssize_t)box * box * box * box) {
+        PyBuffer_Release(&cells);
+        PyErr_SetString(PyExc_ValueError, "invalid grid");
+        return NULL;
+    }
+    if (check == Py_None) {
+        check = NULL;
+    }
+
+    Search *search = PyMem_Malloc(sizeof(Search));
+    if (search == NULL) {
+        PyBuffer_Release(&cells);
+        return PyErr_NoMemory();
+    }
+    search->nodes = start;
+    int loaded = load(search, box, cells.buf);
+    PyBuffer_Release(&cells);
+
+    long count = 0;
+    unsigned char first[MAX_CELLS];
+    int stopped = 0;
+    if (loaded && limit > 0) {
+        if (check == NULL) {
+            Py_BEGIN_ALLOW_THREADS
+            stopped = run(search, limit, NULL, &count, first);
+            Py_END_ALLOW_THREADS
+        }
+        else {
+            stopped = run(search, limit, check, &count, first);
+        }
+    }
+    if (stopped < 0) {
+        PyMem_Free(search);
+        return NULL;
+    }
+
+    PyObject *remaining = PyList_New(0);
+    if (remaining == NULL) {
+        PyMem_Free(search);
+        return NULL;
+    }
+    if (stopped && give_back(search, search->depth, remaining) < 0) {
+        Py_DECREF(remaining);
+        PyMem_Free(search);
+        return NULL;
+    }
+
+    PyObject *solution = Py_None;
+    Py_INCREF(solution);
+    if (count > 0) {
+        Py_DECREF(solution);
+        solution = PyBytes_FromStringAndSize((const char *)first, search->cell_count);
+        if (solution == NULL) {
+            Py_DECREF(remaining);
+            PyMem_Free(search);
+            return NULL;
+        }
+    }
+    unsigned long nodes = search->nodes - start;
+    PyMem_Free(search);
+    return Py_BuildValue("lNNk", count, solution, remaining, nodes);
+}
+
+static PyMethodDef kernel_methods[] = {
+    {"search", (PyCFunction)(void (*)(void))kernel_search, METH_VARARGS | METH_KEYWORDS,
+     search_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef kernel_module = {
+    PyModuleDef_HEAD_INIT,
+    "_kernel",
+    "Compiled search for the sudoku solver.",
+    -1,
+    kernel_methods
+};
+
+PyMODINIT_FUNC
+PyInit__kernel(void)
+{
+    return PyModule_Create(&kernel_module);
+}
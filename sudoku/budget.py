@@ -0,0 +1,164 @@
+"""budget.py
+Limits on how much work a solve or generate call may do. A Budget caps the nodes searched, the
+wall time and the memory the call adds to the process, and can be cancelled from another thread
+through a CancellationToken. Once a budget is exceeded the call raises BudgetExceeded instead of
+running on.
+"""
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .solver import CHECK_INTERVAL
+
+# Where Linux reports the current memory of the process.
+STATM = "/proc/self/statm"
+
+class BudgetExceeded(Exception):
+    """ Raised when a solve or generate call runs out of budget or is cancelled.
+    """
+    def __init__(self, reason: str):
+        """ Initialize the exception.
+
+        Keyword Arguments
+            reason (str) -- What ran out, one of the Budget reasons.
+        """
+        super().__init__(f"budget exceeded: {reason}")
+        self.reason = reason
+
+class CancellationToken:
+    """ A flag that can be set from any thread to cancel the calls using it.
+    """
+    def __init__(self):
+        """ Initialize the token.
+        """
+        self._event = threading.Event()
+
+    def cancel(self):
+        """ Cancel the calls using this token.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """ True once the token has been cancelled.
+        """
+        return self._event.is_set()
+
+class Budget:
+    """ The budget for a solve or generate call. Every limit is optional.
+    The time and memory limits start the first time the budget is used, so a budget passed to
+    generate_board covers the solves it does as well.
+    """
+    CANCELLED = "cancelled"
+    NODES = "nodes"
+    TIME = "time"
+    MEMORY = "memory"
+
+    def __init__(self, nodes: int = None, seconds: float = None, memory: int = None,
+                 token: CancellationToken = None):
+        """ Initialize the budget.
+
+        Keyword Arguments
+            nodes (int) -- The most search nodes to visit.
+            seconds (float) -- The most wall time to take.
+            memory (int) -- The most memory in bytes the process may grow by, measured from when
+                            the budget starts. The worker processes of parallel_solve are not
+                            included.
+            token (CancellationToken) -- Cancels the calls when it is cancelled.
+        """
+        assert memory is None or _memory_in_use() is not None, \
+            "memory budgets are not supported here"
+        self.nodes = nodes
+        self.seconds = seconds
+        self.memory = memory
+        self.token = token
+        self.spent = 0
+        self.reason = None
+        self._searching = 0
+        self._started = False
+        self._deadline = None
+        self._baseline = None
+
+    def start(self):
+        """ Start the time and memory limits, if they have not been started already.
+        """
+        if self._started:
+            return
+        self._started = True
+        if self.seconds is not None:
+            self._deadline = time.monotonic() + self.seconds
+        if self.memory is not None:
+            self._baseline = _memory_in_use()
+
+    def spend(self, nodes: int) -> bool:
+        """ Count the nodes a search visited against the budget, once the search is done.
+
+        Keyword Arguments
+            nodes (int) -- The number of nodes searched.
+
+        Return:
+            True if the budget is exceeded, False otherwise.
+        """
+        self._searching = 0
+        self.spent += nodes
+        return self.exceeded()
+
+    def check(self) -> bool:
+        """ The check for solver.search, called every CHECK_INTERVAL nodes. The nodes are counted
+        for the running search until spend is called with the nodes it really visited.
+
+        Return:
+            True if the budget is exceeded, False otherwise.
+        """
+        self._searching += CHECK_INTERVAL
+        return self.exceeded()
+
+    def exceeded(self) -> bool:
+        """ Check every limit of the budget, keeping the reason of the first one exceeded.
+
+        Return:
+            True if the budget is exceeded, False otherwise.
+        """
+        if self.reason is None:
+            self.start()
+            if self.token is not None and self.token.cancelled:
+                self.reason = self.CANCELLED
+            elif self.nodes is not None and self.spent + self._searching >= self.nodes:
+                self.reason = self.NODES
+            elif self._deadline is not None and time.monotonic() >= self._deadline:
+                self.reason = self.TIME
+            elif self.memory is not None and _memory_in_use() - self._baseline >= self.memory:
+                self.reason = self.MEMORY
+        return self.reason is not None
+
+    def enforce(self):
+        """ Raise BudgetExceeded if the budget is exceeded.
+        """
+        if self.exceeded():
+            raise BudgetExceeded(self.reason)
+
+def _memory_in_use():
+    """ Internal function to get the resident memory of the process in bytes. Where the current
+    memory cannot be read the peak memory is used instead, which only ever grows.
+
+    Return:
+        The memory in bytes, None if it cannot be measured here.
+    """
+    try:
+        with open(STATM, encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak in kilobytes, macOS in bytes.
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
@@ -0,0 +1,108 @@
+"""geometry.py
+Precomputed lookup tables for the layout of the sudoku board. The tables only depend on the size
+of the board, so they are built once per size and shared by every Puzzle, solver and validator.
+"""
+import math
+from typing import NamedTuple, Tuple
+
+SUPPORTED_SIZES = (4, 9, 16, 25)
+
+class Geometry(NamedTuple):
+    """ The immutable lookup tables for a single board size.
+
+    Cells are indexed from 0 in row major order. Rows, columns and blocks are numbered from 1 to
+    match the Puzzle, so the row of a cell is row_of[index] and the cells of row r are rows[r-1].
+    """
+    size: int
+    box: int
+    cell_count: int
+    row_of: Tuple[int, ...]
+    column_of: Tuple[int, ...]
+    block_of: Tuple[int, ...]
+    rows: Tuple[Tuple[int, ...], ...]
+    columns: Tuple[Tuple[int, ...], ...]
+    blocks: Tuple[Tuple[int, ...], ...]
+    units: Tuple[Tuple[int, ...], ...]
+    peers: Tuple[Tuple[int, ...], ...]
+
+    def index(self, row: int, column: int) -> int:
+        """ Get the index of the cell at the given row and column.
+
+        Keyword Arugments:
+            row (int): The row of the cell.
+
+            column (int): The column of the cell.
+
+        Return:
+            The index of the cell in the board.
+        """
+        return (row - 1) * self.size + column - 1
+
+def _build(size: int) -> Geometry:
+    """ Build the lookup tables for the given size.
+
+    Keyword Arugments:
+        size (int): The size of the board, needs to be square rootable.
+
+    Return:
+        The Geometry for the board size.
+    """
+    box = math.isqrt(size)
+    assert box * box == size, "size needs to be square rootable"
+    cell_count = size * size
+
+    row_of = tuple(index // size + 1 for index in range(cell_count))
+    column_of = tuple(index % size + 1 for index in range(cell_count))
+    block_of = tuple(
+        (row_of[index] - 1) // box * box + (column_of[index] - 1) // box + 1
+        for index in range(cell_count)
+    )
+
+    rows = tuple(
+        tuple(index for index in range(cell_count) if row_of[index] == row)
+        for row in range(1, size + 1)
+    )
+    columns = tuple(
+        tuple(index for index in range(cell_count) if column_of[index] == column)
+        for column in range(1, size + 1)
+    )
+    blocks = tuple(
+        tuple(index for index in range(cell_count) if block_of[index] == block)
+        for block in range(1, size + 1)
+    )
+
+    peers = []
+    for index in range(cell_count):
+        cells = set(rows[row_of[index] - 1])
+        cells.update(columns[column_of[index] - 1])
+        cells.update(blocks[block_of[index] - 1])
+        cells.discard(index)
+        peers.append(tuple(sorted(cells)))
+
+    return Geometry(
+        size=size,
+        box=box,
+        cell_count=cell_count,
+        row_of=row_of,
+        column_of=column_of,
+        block_of=block_of,
+        rows=rows,
+        columns=columns,
+        blocks=blocks,
+        units=rows + columns + blocks,
+        peers=tuple(peers),
+    )
+
+_GEOMETRIES = {size: _build(size) for size in SUPPORTED_SIZES}
+
+def get_geometry(size: int) -> Geometry:
+    """ Get the shared lookup tables for the given board size.
+
+    Keyword Arugments:
+        size (int): The size of the board, one of SUPPORTED_SIZES.
+
+    Return:
+        The Geometry for the board size.
+    """
+    assert size in _GEOMETRIES, "unsupported board size"
+    return _GEOMETRIES[size]
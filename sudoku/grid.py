@@ -0,0 +1,148 @@
+"""grid.py
+An immutable snapshot of the values on a sudoku board. The values are kept in a flat byte array
+that is never changed once the grid is made, so forking a grid to try a value is a single small
+copy and grids can be handed to other processes cheaply.
+"""
+from .geometry import get_geometry
+
+EMPTY = 0
+
+class Grid:
+    """ The immutable values of a board, with 0 for an empty cell. Cells are indexed from 0 in
+    row major order, the same as the Geometry tables.
+    """
+    __slots__ = ("geometry", "_cells")
+
+    def __init__(self, size: int, cells: bytes = None):
+        """ Initialize the grid.
+
+        Keyword Arugments:
+            size (int): The size of the board, needs to be square rootable.
+
+            cells (bytes): The values of the cells in row major order, empty when not given.
+        """
+        self.geometry = get_geometry(size)
+        if cells is None:
+            cells = bytes(self.geometry.cell_count)
+        assert len(cells) == self.geometry.cell_count, "invalid number of cells"
+        self._cells = bytearray(cells)
+
+    @property
+    def size(self) -> int:
+        """ The size of the board.
+        """
+        return self.geometry.size
+
+    @property
+    def cells(self) -> memoryview:
+        """ A read only view of the values of the cells in row major order.
+        """
+        return memoryview(self._cells).toreadonly()
+
+    def __getitem__(self, index: int) -> int:
+        """ Get the value of the cell at the index, 0 if the cell is empty.
+        """
+        return self._cells[index]
+
+    def get(self, row: int, column: int) -> int:
+        """ Get the value of the cell at the given row and column.
+
+        Keyword Arugments:
+            row (int): The row of the cell.
+
+            column (int): The column of the cell.
+
+        Return:
+            The value of the cell, 0 if the cell is empty.
+        """
+        return self._cells[self.geometry.index(row, column)]
+
+    def fork(self, index: int, value: int) -> "Grid":
+        """ Create a new grid with the value of one cell changed, this grid is left untouched.
+
+        Keyword Arugments:
+            index (int): The index of the cell to change.
+
+            value (int): The value for the cell, 0 to empty it.
+
+        Return:
+            The new grid.
+        """
+        assert 0 <= value <= self.geometry.size, "invalid value"
+        cells = bytearray(self._cells)
+        cells[index] = value
+        return Grid._from_trusted(self.geometry, cells)
+
+    def find_empty(self):
+        """ Find the first empty cell in the grid.
+
+        Return:
+            The index of the cell, None if there are no empty cells.
+        """
+        index = self._cells.find(EMPTY)
+        if index == -1:
+            return None
+        return index
+
+    def valid(self) -> bool:
+        """ Check that no value is out of range or repeated in a row, column or block.
+
+        Return:
+            True if the grid is valid, False otherwise.
+        """
+        cells = self._cells
+        size = self.geometry.size
+        for unit in self.geometry.units:
+            answers = set()
+            for index in unit:
+                value = cells[index]
+                if value != EMPTY:
+                    if value > size or value in answers:
+                        return False
+                    answers.add(value)
+        return True
+
+    def candidates(self, index: int):
+        """ Get the values that can go into a cell without repeating one of its peers.
+
+        Keyword Arugments:
+            index (int): The index of the cell.
+
+        Return:
+            A list of the possible values in increasing order.
+        """
+        cells = self._cells
+        used = {cells[peer] for peer in self.geometry.peers[index]}
+        return [value for value in range(1, self.geometry.size + 1) if value not in used]
+
+    def __eq__(self, other):
+        """ Grids are equal when they have the same size and values.
+        """
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return self._cells == other._cells and self.geometry.size == other.geometry.size
+
+    def __hash__(self):
+        """ Hash the grid by size and values, so it can be used as a key.
+        """
+        return hash((self.geometry.size, bytes(self._cells)))
+
+    def __reduce__(self):
+        """ Pickle the grid by size so the shared geometry tables are not copied.
+        """
+        return (Grid, (self.geometry.size, bytes(self._cells)))
+
+    def __repr__(self):
+        """ Tells stuff how to show the grid while debugging.
+        """
+        return f"Grid({self.geometry.size}, {bytes(self._cells)!r})"
+
+    @classmethod
+    def _from_trusted(cls, geometry, cells) -> "Grid":
+        """ Internal constructor that shares the geometry and skips the checks. The grid takes
+        the cells, bytes or a bytearray, as they are, so they must not be changed afterwards.
+        """
+        grid = cls.__new__(cls)
+        grid.geometry = geometry
+        grid._cells = cells
+        return grid
@@ -0,0 +1,202 @@
+"""parallel.py
+Solve a single Grid across several processes. The search is split into a frontier of grids that
+are handed to a process pool a few at a time. When the pool runs low on work a busy worker gives
+away a few of the shallowest grids it has not searched yet and keeps searching the rest, so idle
+workers can pick them up.
+"""
+import os
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .grid import Grid
+from . import solver
+
+# Frontier grids per worker, more grids balance better but cost more to hand out.
+GRIDS_PER_WORKER = 8
+# Grids handed out together in one task.
+GRIDS_PER_TASK = 4
+# How often to check on the workers while waiting on them.
+POLL_SECONDS = 0.05
+
+_stop = None
+_wanted = None
+_donations = None
+_nodes = None
+_donate = False
+# The nodes _check has counted for the running search call.
+_charged = 0
+
+def _initialize(stop, wanted, donations, nodes):
+    """ Internal function to share the events with a worker process.
+
+    Keyword Arugments:
+        stop (Event): Set once enough solutions have been found.
+
+        wanted (Value): How many more tasks the idle workers want.
+
+        donations (Queue): Where the workers put the grids they give away.
+
+        nodes (Value): About how many nodes all the workers have searched.
+    """
+    global _stop, _wanted, _donations, _nodes
+    _stop = stop
+    _wanted = wanted
+    _donations = donations
+    _nodes = nodes
+    # Grids left in the queue once the search is done are not needed, do not wait on them.
+    _donations.cancel_join_thread()
+
+def _check() -> bool:
+    """ Internal function to tell the worker search to stop, either because the search is done or
+    to give away some of its grids to the idle workers.
+    """
+    global _donate, _charged
+    _charged += solver.CHECK_INTERVAL
+    with _nodes.get_lock():
+        _nodes.value += solver.CHECK_INTERVAL
+    if _stop.is_set():
+        return True
+    with _wanted.get_lock():
+        if _wanted.value > 0:
+            _wanted.value -= 1
+            _donate = True
+    return _donate
+
+def _give_away(stack: list) -> bool:
+    """ Internal function to give away the shallowest grids of the stack, keeping at least one.
+
+    Keyword Arugments:
+        stack (list): The grids not searched yet, the shallowest first.
+
+    Return:
+        True if grids were given away, False otherwise.
+    """
+    if len(stack) <= 1:
+        with _wanted.get_lock():
+            _wanted.value += 1
+        return False
+    count = min(GRIDS_PER_TASK, len(stack) - 1)
+    _donations.put(stack[:count])
+    del stack[:count]
+    return True
+
+def _work(grids: list, limit: int):
+    """ Internal function that searches a few grids in a worker process.
+
+    Keyword Arugments:
+        grids (list): The grids to search.
+
+        limit (int): Stop once this many solutions have been found.
+
+    Return:
+        The number of solutions found, the first solution or None, and how many tasks were given
+        away.
+    """
+    global _donate, _charged
+    count = 0
+    solution = None
+    donated = 0
+    stack = list(reversed(grids))
+    while stack and count < limit and not _stop.is_set():
+        _donate = False
+        _charged = 0
+        found, first, stack, nodes = solver.search(stack, limit - count, _check)
+        # _check already counted some of the nodes, count the rest.
+        with _nodes.get_lock():
+            _nodes.value += nodes - _charged
+        count += found
+        if solution is None:
+            solution = first
+        if _donate and stack and _give_away(stack):
+            donated += 1
+    return count, solution, donated
+
+def _tasks(grids: list):
+    """ Internal function to split the grids into tasks.
+
+    Keyword Arugments:
+        grids (list): The grids to hand out.
+
+    Return:
+        A list of lists of at most GRIDS_PER_TASK grids.
+    """
+    return [grids[start:start + GRIDS_PER_TASK] for start in range(0, len(grids), GRIDS_PER_TASK)]
+
+def parallel_solve(grid: Grid, limit: int = 1, workers: int = None, budget=None):
+    """ Count the solutions of the grid across a pool of processes, up to the limit.
+
+    Keyword Arugments:
+        grid (Grid): The grid to solve, a grid that is not valid has no solutions.
+
+        limit (int): Stop once this many solutions have been found, 1 to solve and 2 to check
+            the solution is unique.
+
+        workers (int): The number of processes to use, defaults to the number of CPUs.
+
+        budget (Budget): The budget for the search, raises BudgetExceeded once it runs out.
+
+    Return:
+        The number of solutions found, at most the limit, and the first solution found or None if
+        there is no solution.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if budget is not None:
+        budget.enforce()
+    frontier = solver.expand(grid, workers * GRIDS_PER_WORKER)
+
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    wanted = context.Value("i", 0)
+    donations = context.Queue()
+    nodes = context.Value("q", 0)
+    counted = 0
+    count = 0
+    solution = None
+    donated = 0
+    received = 0
+
+    executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_initialize,
+                                   initargs=(stop, wanted, donations, nodes))
+    try:
+        pending = {executor.submit(_work, task, limit) for task in _tasks(frontier)}
+        while pending or received < donated:
+            done, pending = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, first, given = future.result()
+                count += found
+                donated += given
+                if solution is None:
+                    solution = first
+            if count >= limit:
+                break
+            if budget is not None:
+                searched = nodes.value
+                exceeded = budget.spend(searched - counted)
+                counted = searched
+                if exceeded:
+                    break
+
+            # Only wait on the queue when there is nothing else left to wait on.
+            block = not pending
+            while received < donated or not block:
+                try:
+                    task = donations.get(block, POLL_SECONDS)
+                except queue.Empty:
+                    break
+                received += 1
+                pending.add(executor.submit(_work, task, limit))
+                block = False
+
+            with wanted.get_lock():
+                wanted.value = max(workers - len(pending), 0)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Count the nodes the workers searched since the last poll, once they have all stopped.
+        if budget is not None:
+            budget.spend(nodes.value - counted)
+
+    if count < limit and budget is not None and budget.reason is not None:
+        budget.enforce()
+    return min(count, limit), solution
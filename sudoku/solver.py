@@ -0,0 +1,163 @@
+"""solver.py
+The search used to solve and count the solutions of a Grid. The search keeps its own stack of
+forked grids, so it can be stopped part way through and the unexplored grids handed elsewhere.
+
+When the compiled _kernel extension was built it is used for the search, otherwise the pure
+Python search is used. Both branch in the same order, give identical results and call check on
+the same schedule, which tests/test_solver.py checks.
+"""
+from .grid import Grid
+
+try:
+    from . import _kernel
+except ImportError:
+    _kernel = None
+
+ACCELERATED = _kernel is not None
+
+CHECK_INTERVAL = 256
+
+def choose(grid: Grid):
+    """ Choose the empty cell with the fewest candidates to branch on.
+
+    Keyword Arugments:
+        grid (Grid): The grid to branch on.
+
+    Return:
+        The index of the cell and its candidates, or None, None if the grid is full. The list of
+        candidates is empty when the cell has no possible value.
+    """
+    cells = grid.cells
+    best_index = None
+    best_candidates = None
+    for index, value in enumerate(cells):
+        if value:
+            continue
+        candidates = grid.candidates(index)
+        if best_candidates is None or len(candidates) < len(best_candidates):
+            best_index = index
+            best_candidates = candidates
+            if len(candidates) <= 1:
+                break
+    return best_index, best_candidates
+
+def search(stack: list, limit: int = 1, check=None):
+    """ Depth first search the grids on the stack for solutions, using the compiled kernel when
+    it is available.
+
+    Keyword Arugments:
+        stack (list): The grids to search, searched from the end. The list is used up. Grids
+            that are not valid have no solutions.
+
+        limit (int): Stop once this many solutions have been found.
+
+        check (callable): Called every CHECK_INTERVAL nodes, the search stops when it returns True.
+
+    Return:
+        The number of solutions found, the first solution or None, the grids that were not
+        searched yet, and the number of nodes searched. The remaining grids are only non empty
+        when check stopped the search.
+    """
+    if _kernel is None:
+        return _python_search(stack, limit, check)
+
+    count = 0
+    solution = None
+    nodes = 0
+    while stack and count < limit:
+        grid = stack.pop()
+        # Pass on the nodes searched so far, so check is called on the same schedule as the
+        # Python search rather than starting again for every grid.
+        found, first, remaining, searched = _kernel.search(grid.cells, grid.geometry.box,
+                                                           limit - count, check, nodes)
+        count += found
+        nodes += searched
+        if solution is None and first is not None:
+            solution = Grid._from_trusted(grid.geometry, first)
+        if remaining:
+            # The kernel gives back the deepest grid first, keep it on top of the stack.
+            stack.extend(Grid._from_trusted(grid.geometry, cells) for cells in reversed(remaining))
+            return count, solution, stack, nodes
+    if count >= limit:
+        stack.clear()
+    return count, solution, stack, nodes
+
+def _python_search(stack: list, limit: int = 1, check=None):
+    """ The pure Python version of search, used when the compiled kernel is not available.
+    """
+    # Grids forked during the search are always valid, so only the grids passed in are checked,
+    # the same as the kernel does when it loads a grid.
+    stack[:] = [grid for grid in stack if grid.valid()]
+    count = 0
+    solution = None
+    nodes = 0
+    while stack:
+        nodes += 1
+        if check is not None and nodes % CHECK_INTERVAL == 0 and check():
+            break
+        grid = stack.pop()
+        index, candidates = choose(grid)
+        if index is None:
+            count += 1
+            if solution is None:
+                solution = grid
+            if count >= limit:
+                stack.clear()
+                break
+            continue
+        # Push in reverse so the smallest value is tried first.
+        for value in reversed(candidates):
+            stack.append(grid.fork(index, value))
+    return count, solution, stack, nodes
+
+def count_solutions(grid: Grid, limit: int = 1, budget=None):
+    """ Count the solutions of the grid, up to the limit.
+
+    Keyword Arugments:
+        grid (Grid): The grid to solve, a grid that is not valid has no solutions.
+
+        limit (int): Stop once this many solutions have been found.
+
+        budget (Budget): The budget for the search, raises BudgetExceeded once it runs out.
+
+    Return:
+        The number of solutions found and the first solution, or None if there is no solution.
+    """
+    if budget is None:
+        count, solution, _, _ = search([grid], limit)
+        return count, solution
+
+    budget.enforce()
+    count, solution, remaining, nodes = search([grid], limit, budget.check)
+    budget.spend(nodes)
+    if remaining:
+        budget.enforce()
+    return count, solution
+
+def expand(grid: Grid, width: int):
+    """ Split the search of the grid into at least width independent grids where possible.
+    The solutions of the returned grids are exactly the solutions of the grid.
+
+    Keyword Arugments:
+        grid (Grid): The grid to split.
+
+        width (int): The number of grids wanted.
+
+    Return:
+        A list of grids, solved grids are kept and dead ends are dropped.
+    """
+    frontier = [grid]
+    while len(frontier) < width:
+        expanded = []
+        split = False
+        for current in frontier:
+            index, candidates = choose(current)
+            if index is None:
+                expanded.append(current)
+                continue
+            split = True
+            expanded.extend(current.fork(index, value) for value in candidates)
+        frontier = expanded
+        if not split:
+            break
+    return frontier
@@ -8,6 +8,11 @@ import math
 from enum import Enum
 import random
 import datetime
+from .geometry import get_geometry
+from .grid import Grid, EMPTY
+from .parallel import parallel_solve
+from .budget import Budget, BudgetExceeded
+from . import solver
 
 def clear():
     """ Clears the console
@@ -48,7 +53,8 @@ class Puzzle:
         """
         self.board = []
         self.size = size + 1
-        self.square_root = math.sqrt(size)
+        self.geometry = get_geometry(size)
+        self.square_root = self.geometry.box
         self.state = self.States.SOLVING
         self._solution = False
         for row in range(1, self.size):
@@ -73,9 +79,9 @@ class Puzzle:
             initial (bool) default: False: When set to true, this means this cell is a starter cell.
                                     Starter cells cannot be deleted
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
-        assert 0 < value <= self.size or value == -1, "invalid value"
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
+        assert 0 < value < self.size or value == -1, "invalid value"
         return self._set_cell(row, column, value, initial)
 
     def add_hint(self, row: int, column: int, value: int):
@@ -90,9 +96,9 @@ class Puzzle:
         Return:
             Return the hints of the cell. 
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
-        assert 0 < value <= self.size or value == -1, "invalid value"
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
+        assert 0 < value < self.size or value == -1, "invalid value"
         cell = self._get_cell(row, column)
 
         if cell[self.VALUE] == self.INVALID and cell[self.INITIAL] is False:
@@ -113,9 +119,9 @@ class Puzzle:
         Return:
             True if the remove is successul, False otherwise.
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
-        assert 0 < value <= self.size or value == -1, "invalid value"
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
+        assert 0 < value < self.size or value == -1, "invalid value"
         cell = self._get_cell(row, column)
 
         if cell[self.VALUE] == self.INVALID and cell[self.INITIAL] is False:
@@ -135,8 +141,8 @@ class Puzzle:
         Return:
             An list of possible values for the cell.
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
         cell = self._get_cell(row, column)
 
         if cell[self.VALUE] == self.INVALID and cell[self.INITIAL] is False:
@@ -159,16 +165,8 @@ class Puzzle:
         Return:
             True if the current board is valid, False otherwise.
         """
-        for row in range(1, self.size):
-            if self._validate_row(row) is False:
-                return False
-
-        for column in range(1, self.size):
-            if self._validate_column(column) is False:
-                return False
-
-        for block in range(1, self.size):
-            if self._validate_block(block) is False:
+        for unit in self.geometry.units:
+            if self._validate_unit(unit) is False:
                 return False
         return True
 
@@ -184,57 +182,137 @@ class Puzzle:
         return None
 
 
-    def brute_force_solve(self, first_time = None , solution = 0) -> int:
+    def snapshot(self) -> Grid:
+        """ Take an immutable snapshot of the values on the board.
+
+        Return:
+            The Grid with the current values of the board.
+        """
+        return Grid(self.geometry.size, bytes(
+            EMPTY if cell[self.VALUE] == self.INVALID else cell[self.VALUE] for cell in self.board
+        ))
+
+    def restore(self, grid: Grid):
+        """ Restore the values on the board from a snapshot. Cells that are empty in the snapshot
+        are no longer starter cells.
+
+        Keyword Arugments:
+            grid (Grid): The snapshot to restore.
+        """
+        assert grid.size == self.geometry.size, "snapshot is for a different board size"
+        for cell, value in zip(self.board, grid.cells):
+            if value == EMPTY:
+                cell[self.VALUE] = self.INVALID
+                cell[self.INITIAL] = False
+            else:
+                cell[self.VALUE] = value
+
+    def brute_force_solve(self, budget: Budget = None) -> int:
         """ Brute force solve the Puzzle
 
+        Keyword Arugments:
+            budget (Budget): The budget for the search, raises BudgetExceeded once it runs out.
+
         Return:
-            True once a solution is found, otherwise return false.
+            1 once a solution is found, otherwise return 0.
         """
+        if budget is not None:
+            budget.enforce()
+        if not self.validate():
+            return 0
 
         # Only timeout when we are generating a solution
+        first_time = None
         if self.state == self.States.GENERATING:
-            if not first_time:
-                first_time = datetime.datetime.now()
-            else:
-                now = datetime.datetime.now()
-                difference = now - first_time
-                if difference.seconds >= 1:
-                    return 0
-
-        find = self.find_empty()
-        if not find:
-            return solution+1
-        row, column = find
-
-        for i in range(1, self.size):
-            self.fill(row, column, i)
-            if self.validate():
-                count = self.brute_force_solve(first_time, solution)
-                if count != solution:
-                    return count
-            self.fill(row, column, self.INVALID)
-        return 0
-
-    def generate_board(self, difficulty: Difficulty = Difficulty.EASY):
+            first_time = datetime.datetime.now()
+
+        # Without a check the kernel can search without holding the GIL.
+        check = None
+        if budget is not None or first_time is not None:
+            def check():
+                if budget is not None and budget.check():
+                    return True
+                return first_time is not None and \
+                    (datetime.datetime.now() - first_time).seconds >= 1
+
+        _, solved, remaining, nodes = solver.search([self.snapshot()], 1, check)
+        if budget is not None:
+            budget.spend(nodes)
+            if remaining:
+                budget.enforce()
+        if solved is None:
+            return 0
+        self.restore(solved)
+        return 1
+
+    def parallel_solve(self, limit: int = 1, workers: int = None, budget: Budget = None) -> int:
+        """ Solve the Puzzle by splitting the search across a pool of processes.
+
+        Keyword Arugments:
+            limit (int): Stop once this many solutions have been found, 1 to solve and 2 to check
+                the solution is unique.
+
+            workers (int): The number of processes to use, defaults to the number of CPUs.
+
+            budget (Budget): The budget for the search, raises BudgetExceeded once it runs out.
+
+        Return:
+            The number of solutions found, at most the limit. The first solution found is filled
+            in on the board.
+        """
+        if not self.validate():
+            return 0
+
+        count, solved = parallel_solve(self.snapshot(), limit, workers, budget)
+        if solved is not None:
+            self.restore(solved)
+        return count
+
+    def generate_board(self, difficulty: Difficulty = Difficulty.EASY, budget: Budget = None):
         """ Generates a board with the given difficulty value. 
+
+        Keyword Arugments:
+            difficulty (Difficulty): The difficulty of the board to generate.
+
+            budget (Budget): The budget for generating, including the solves it does. When it runs
+                out the board is left empty and BudgetExceeded is raised.
         """
         self.state = self.States.GENERATING
         seed_value = random.randrange(sys.maxsize)
         random.seed(seed_value)
+        blank = Grid(self.geometry.size)
+
+        try:
+            self._generate_until_valid(difficulty, blank, budget)
+        except BudgetExceeded:
+            self.restore(blank)
+            raise
+        finally:
+            self.state = self.States.SOLVING
 
+    def _generate_until_valid(self, difficulty: Difficulty, blank: Grid, budget: Budget = None):
+        """ Helper function that keeps generating boards until one is valid.
+
+        Keyword Arugments:
+            difficulty (Difficulty): The difficulty of the board to generate.
+
+            blank (Grid): The empty snapshot to start every try from.
+
+            budget (Budget): The budget for generating.
+        """
         while True:
+            if budget is not None:
+                budget.enforce()
+            self.restore(blank)
             print("Generating a new board")
-            self._generate_board()
+            self._generate_board(budget)
             self.pretty_print()
             print("Generation of board done, brute force solving the rest.")
             assert self.validate(), ("The Board generated before brute force solving is not valid.")
-            self.brute_force_solve()
+            self.brute_force_solve(budget)
             self.pretty_print()
             if self.find_empty():
                 print("Generated Board Not Solvable")
-                for cell in self.board:
-                    cell[self.VALUE] = self.INVALID
-                    cell[self.INITIAL] = False
                 continue
 
             remove = self._get_remove_count(difficulty)
@@ -249,12 +327,11 @@ class Puzzle:
             for cell in self.board:
                 if cell[self.VALUE] != self.INVALID:
                     cell[self.INITIAL] = True
-            if self.brute_force_solve() > 1:
+            if solver.count_solutions(self.snapshot(), 2, budget)[0] > 1:
                 print("The solution is not uique.")
                 continue
             self.clear()
             print("WE GENERATED A VALID BOARD!")
-            self.state = self.States.SOLVING
             return
 
     def clear(self):
@@ -264,9 +341,12 @@ class Puzzle:
             if not cell[self.INITIAL]:
                 cell[self.VALUE] = self.INVALID
 
-    def _generate_board(self):
+    def _generate_board(self, budget: Budget = None):
         """ Helper functiont hat will generate a board. It will make sure there is at least one
         value in each block, and will randomly add up to three.
+
+        Keyword Arugments:
+            budget (Budget): The budget for generating.
         """
         first = random.randint(1, self.size-1)
         second = random.randint(1, self.size-1)
@@ -283,10 +363,14 @@ class Puzzle:
             first_time = datetime.datetime.now()
             while count < max_count:
 
+                if budget is not None:
+                    budget.enforce()
+
+                # Give up on filling the block after half a second and move on.
                 now = datetime.datetime.now()
                 difference = now - first_time
                 if (difference.total_seconds() * 1000) >= 500:
-                    continue
+                    break
 
                 row = random.randint(1, self.size-1)
                 column = random.randint(1, self.size-1)
@@ -360,18 +444,15 @@ class Puzzle:
         Return:
             True if the set is successfull, false otherwise.
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
-
-        for cell in self.board:
-            if cell[self.ROW] == row and cell[self.COLUMN] == column:
-                # If the cell is not a initial cell then we can overwrite it.
-                if not cell[self.INITIAL]:
-                    cell[self.VALUE] = value
-                    cell[self.INITIAL] = initial
-                    return True
-                return False
-
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
+
+        cell = self.board[self.geometry.index(row, column)]
+        # If the cell is not a initial cell then we can overwrite it.
+        if not cell[self.INITIAL]:
+            cell[self.VALUE] = value
+            cell[self.INITIAL] = initial
+            return True
         return False
 
     def _get_cell(self, row: int, column: int):
@@ -386,15 +467,10 @@ class Puzzle:
         Return:
             Return the cell from the row and column
         """
-        assert 0 < row <= self.size, "invalid row value"
-        assert 0 < column <= self.size, "invalid column value"
-
-        for cell in self.board:
-            if cell[self.ROW] == row and cell[self.COLUMN] == column:
-                return cell
+        assert 0 < row < self.size, "invalid row value"
+        assert 0 < column < self.size, "invalid column value"
 
-        # Should never get here...
-        assert False, "Why do we get here?"
+        return self.board[self.geometry.index(row, column)]
 
     def _validate_row(self, row: int) -> bool:
         """ Internal function to validate the given row in the puzzle.
@@ -405,14 +481,7 @@ class Puzzle:
         Returns:
             True if the row is valid, False otherwise.
         """
-        answers = []
-        for column in range(1, self.size):
-            value = self._get_cell(row, column)[self.VALUE]
-            if value != self.INVALID:
-                if value in answers:
-                    return False
-                answers.append(value)
-        return True
+        return self._validate_unit(self.geometry.rows[row-1])
 
     def _validate_column(self, column: int) ->bool:
         """ Internal function to validate the given column in the puzzle.
@@ -423,14 +492,7 @@ class Puzzle:
         Return:
             True if the column is valid, False otherwise.
         """
-        answers = []
-        for row in range(1, self.size):
-            value = self._get_cell(row, column)[self.VALUE]
-            if value != self.INVALID:
-                if value in answers:
-                    return False
-                answers.append(value)
-        return True
+        return self._validate_unit(self.geometry.columns[column-1])
 
     def _validate_block(self, block: int) ->bool:
         """ Internal function to validate the given block in the puzzle.
@@ -441,15 +503,25 @@ class Puzzle:
         Returns:
             True if the block is valid, false otherwise.
         """
-        answers = []
-        for cell in self.board:
-            cell_block = self._get_block(cell[self.ROW], cell[self.COLUMN])
-            if cell_block is block:
-                value = cell[self.VALUE]
-                if value != self.INVALID:
-                    if value in answers:
-                        return False
-                    answers.append(value)
+        return self._validate_unit(self.geometry.blocks[block-1])
+
+    def _validate_unit(self, unit) -> bool:
+        """ Internal function to validate the cells of a row, column or block in the puzzle.
+
+        Keyword Arugments:
+            unit (tuple): The indexes of the cells to verify.
+
+        Returns:
+            True if no value is repeated in the unit, False otherwise.
+        """
+        answers = set()
+        board = self.board
+        for index in unit:
+            value = board[index][self.VALUE]
+            if value != self.INVALID:
+                if value in answers:
+                    return False
+                answers.add(value)
         return True
 
     def _get_block(self, row: int, column: int):
@@ -463,9 +535,7 @@ class Puzzle:
         Returns:
             The block the cell belongs in.
         """
-        rows = (row-1)//self.square_root
-        columns = (column-1)//self.square_root
-        return int((rows * self.square_root) + columns +1)
+        return self.geometry.block_of[self.geometry.index(row, column)]
 
     def _get_remove_count(self, difficulty: Difficulty):
         """ Get amount of cells to remove for the difficulty level
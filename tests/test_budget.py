@@ -0,0 +1,150 @@
+"""test_budget.py
+Tests that budgets and cancellation tokens stop the solve and generate calls.
+"""
+import contextlib
+import datetime
+import io
+import threading
+import unittest
+from unittest import mock
+from sudoku.budget import Budget, BudgetExceeded, CancellationToken
+from sudoku.sudoku import Puzzle
+
+# A valid 16x16 board with no solution, 1 has nowhere to go in the first row. The search does
+# not notice until the first row is nearly full, so it runs for a very long time.
+UNSOLVABLE = ((1, 16, 2), (2, 1, 1), (3, 5, 1), (4, 9, 1), (5, 13, 1), (9, 14, 1), (13, 15, 1))
+
+def unsolvable_puzzle() -> Puzzle:
+    """ Build the 16x16 puzzle with no solution.
+    """
+    puzzle = Puzzle(16)
+    for row, column, value in UNSOLVABLE:
+        puzzle.fill(row, column, value, True)
+    return puzzle
+
+def cancelled_budget() -> Budget:
+    """ Build a budget whose token is already cancelled.
+    """
+    token = CancellationToken()
+    token.cancel()
+    return Budget(token=token)
+
+class Clock:
+    """ Stands in for datetime.datetime, every call to now is a second later than the last.
+    """
+    def __init__(self):
+        """ Initialize the clock.
+        """
+        self.time = datetime.datetime(2020, 1, 1)
+
+    def now(self):
+        """ Move the clock on a second and return the time.
+        """
+        self.time += datetime.timedelta(seconds=1)
+        return self.time
+
+class TestCancellation(unittest.TestCase):
+    """ Tests that a cancelled token stops every entry point.
+    """
+
+    def assert_cancelled(self, call):
+        """ Assert the call raises BudgetExceeded because it was cancelled.
+        """
+        with self.assertRaises(BudgetExceeded) as raised:
+            with contextlib.redirect_stdout(io.StringIO()):
+                call()
+        self.assertEqual(raised.exception.reason, Budget.CANCELLED)
+
+    def test_brute_force_solve(self):
+        """ brute_force_solve raises once the token is cancelled.
+        """
+        puzzle = Puzzle(9)
+        self.assert_cancelled(lambda: puzzle.brute_force_solve(cancelled_budget()))
+
+    def test_generate_board(self):
+        """ generate_board raises once the token is cancelled.
+        """
+        puzzle = Puzzle(9)
+        self.assert_cancelled(lambda: puzzle.generate_board(budget=cancelled_budget()))
+
+    def test_parallel_solve(self):
+        """ parallel_solve raises once the token is cancelled.
+        """
+        puzzle = Puzzle(9)
+        self.assert_cancelled(lambda: puzzle.parallel_solve(workers=2, budget=cancelled_budget()))
+
+    def test_cancel_while_solving(self):
+        """ Cancelling the token from another thread stops a long solve.
+        """
+        token = CancellationToken()
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        try:
+            self.assert_cancelled(lambda: unsolvable_puzzle().brute_force_solve(Budget(token=token)))
+        finally:
+            timer.cancel()
+
+class TestLimits(unittest.TestCase):
+    """ Tests for the node, time and memory limits.
+    """
+
+    def test_seconds_on_unsolvable_board(self):
+        """ A time limit stops the search of a board with no solution instead of hanging.
+        """
+        for solve in (lambda puzzle, budget: puzzle.brute_force_solve(budget),
+                      lambda puzzle, budget: puzzle.parallel_solve(workers=2, budget=budget)):
+            with self.assertRaises(BudgetExceeded) as raised:
+                solve(unsolvable_puzzle(), Budget(seconds=0.3))
+            self.assertEqual(raised.exception.reason, Budget.TIME)
+
+    def test_short_solves_are_counted(self):
+        """ Every node is counted, even for solves that finish before the first check.
+        """
+        budget = Budget(nodes=10)
+        self.assertEqual(Puzzle(9).brute_force_solve(budget), 1)
+        self.assertGreater(budget.spent, 0)
+        with self.assertRaises(BudgetExceeded) as raised:
+            Puzzle(9).brute_force_solve(budget)
+        self.assertEqual(raised.exception.reason, Budget.NODES)
+
+    def test_memory_is_measured_from_the_start(self):
+        """ Memory the process used before the budget started does not count against it.
+        """
+        budget = Budget(memory=1 << 30)
+        self.assertFalse(budget.exceeded())
+        self.assertEqual(Puzzle(9).brute_force_solve(budget), 1)
+        self.assertIsNone(budget.reason)
+
+class TestGenerateBoard(unittest.TestCase):
+    """ Tests for generating a board under a budget.
+    """
+
+    def test_blank_after_budget_failure(self):
+        """ When the budget runs out the board is left empty and back in the solving state.
+        """
+        puzzle = Puzzle(9)
+        with self.assertRaises(BudgetExceeded):
+            with contextlib.redirect_stdout(io.StringIO()):
+                puzzle.generate_board(Puzzle.Difficulty.EXTREME, Budget(nodes=1))
+        self.assertEqual(puzzle.state, Puzzle.States.SOLVING)
+        for cell in puzzle.board:
+            self.assertEqual(cell[Puzzle.VALUE], Puzzle.INVALID)
+            self.assertFalse(cell[Puzzle.INITIAL])
+
+    def test_generate_board_gives_up_on_a_block(self):
+        """ When a block cannot be filled in time the helper moves on instead of looping forever.
+        """
+        puzzle = Puzzle(9)
+        # Starter cells cannot be overwritten, so no block can ever be filled.
+        for cell in puzzle.board:
+            cell[Puzzle.INITIAL] = True
+
+        with mock.patch("sudoku.sudoku.datetime") as fake:
+            fake.datetime = Clock()
+            worker = threading.Thread(target=puzzle._generate_board, daemon=True)
+            worker.start()
+            worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""test_parallel.py
+Tests that the parallel search finds the same solutions as the serial search.
+"""
+import multiprocessing
+import unittest
+from unittest import mock
+from sudoku.budget import Budget, BudgetExceeded
+from sudoku.grid import Grid
+from sudoku import solver, parallel
+
+# A valid board with no solution, the last cell of the first row has no value left.
+NO_SOLUTION = (
+    "12345678."
+    "........."
+    "........."
+    "........."
+    "........9"
+    "........."
+    "........."
+    "........."
+    "........."
+)
+
+# A board with 1920 solutions, counting them all searches a few thousand nodes.
+MANY_SOLUTIONS = (
+    "........."
+    "........."
+    "........."
+    "...674895"
+    "875912364"
+    "694538217"
+    "317265948"
+    "542897631"
+    "968341572"
+)
+
+def parse(board: str, size: int = 9) -> Grid:
+    """ Build a grid from a string with one character per cell, . for an empty cell.
+    """
+    return Grid(size, bytes(0 if value == "." else int(value) for value in board))
+
+def serial_nodes(grids: list) -> int:
+    """ Count the nodes the serial search visits to find every solution of the grids.
+    """
+    return sum(solver.search([grid], 10**9)[3] for grid in grids)
+
+class TestParallelSolve(unittest.TestCase):
+    """ Tests for parallel_solve.
+    """
+
+    def test_many_solutions(self):
+        """ An empty board has many solutions, both searches stop at the limit.
+        """
+        grid = Grid(9)
+        self.assertEqual(parallel.parallel_solve(grid, 2, workers=2)[0],
+                         solver.count_solutions(grid, 2)[0])
+
+    def test_no_solution(self):
+        """ A board with no solution gives no count and no solution.
+        """
+        grid = parse(NO_SOLUTION)
+        self.assertEqual(solver.count_solutions(grid, 2), (0, None))
+        self.assertEqual(parallel.parallel_solve(grid, 2, workers=2), (0, None))
+
+    def test_every_solution_counted(self):
+        """ Counting every solution of a board finds as many as the serial search, even when the
+        workers give grids away.
+        """
+        grid = Grid(4)
+        self.assertEqual(parallel.parallel_solve(grid, 1000, workers=2)[0], 288)
+        grid = Grid(9)
+        self.assertEqual(parallel.parallel_solve(grid, 30000, workers=2)[0],
+                         solver.count_solutions(grid, 30000)[0])
+
+    def test_solution_is_valid(self):
+        """ The solution found fills every cell without repeating a value.
+        """
+        count, solution = parallel.parallel_solve(Grid(16), 1, workers=2)
+        self.assertEqual(count, 1)
+        self.assertIsNone(solution.find_empty())
+        for index in range(solution.geometry.cell_count):
+            self.assertEqual(solution.candidates(index), [solution[index]])
+
+class TestNodeBudget(unittest.TestCase):
+    """ Tests that every node the workers search is counted against the budget.
+    """
+
+    def test_task_nodes(self):
+        """ A task of several grids that gives some away counts the nodes of the grids it kept.
+        A search stopped by its check counts the node it stopped on as well.
+        """
+        grids = solver.expand(parse(MANY_SOLUTIONS), 16)[:parallel.GRIDS_PER_TASK]
+        donations = multiprocessing.Queue()
+        parallel._initialize(multiprocessing.Event(), multiprocessing.Value("i", 1), donations,
+                             multiprocessing.Value("q", 0))
+        with mock.patch.object(parallel.solver, "search", wraps=solver.search) as search:
+            _, _, donated = parallel._work(grids, 10**9)
+        given = [grid for _ in range(donated) for grid in donations.get(timeout=5)]
+        self.assertGreater(donated, 0)
+        self.assertEqual(parallel._nodes.value,
+                         serial_nodes(grids) - serial_nodes(given) + search.call_count - 1)
+
+    def test_budget_counts_every_node(self):
+        """ parallel_solve charges the budget at least every node the serial search visits, so a
+        budget of exactly that many nodes runs out.
+        """
+        grid = parse(MANY_SOLUTIONS)
+        total = serial_nodes(solver.expand(grid, 2 * parallel.GRIDS_PER_WORKER))
+        budget = Budget()
+        self.assertEqual(parallel.parallel_solve(grid, 10**9, workers=2, budget=budget)[0], 1920)
+        self.assertGreaterEqual(budget.spent, total)
+        with self.assertRaises(BudgetExceeded) as raised:
+            parallel.parallel_solve(grid, 10**9, workers=2, budget=Budget(nodes=total))
+        self.assertEqual(raised.exception.reason, Budget.NODES)
+
+    def test_budget_counted_at_the_limit(self):
+        """ The nodes are counted even when the search stops because it found enough solutions.
+        """
+        budget = Budget()
+        self.assertEqual(parallel.parallel_solve(Grid(9), 1, workers=2, budget=budget)[0], 1)
+        self.assertGreater(budget.spent, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""test_solver.py
+Tests that the compiled kernel and the pure Python search give identical results.
+"""
+import random
+import unittest
+from sudoku.grid import Grid
+from sudoku import solver
+
+# The board sizes to check, with how many cells to empty and how many boards to try.
+CASES = ((4, 10, 20), (9, 45, 20), (9, 55, 10), (16, 60, 5), (16, 90, 5))
+
+def random_grids():
+    """ Build the same random valid grids every run, by emptying cells of a solved board.
+    """
+    rng = random.Random(1)
+    for size, empty, count in CASES:
+        start = Grid(size).fork(rng.randrange(size * size), rng.randint(1, size))
+        _, solved, _, _ = solver.search([start], 1)
+        for _ in range(count):
+            cells = bytearray(solved.cells)
+            for index in rng.sample(range(size * size), empty):
+                cells[index] = 0
+            yield Grid(size, cells)
+
+def resume_total(search, grid: Grid) -> int:
+    """ Count every solution of the grid, stopping the search every other check and resuming
+    it with the grids given back.
+    """
+    checks = [0]
+
+    def check():
+        checks[0] += 1
+        return checks[0] % 2 == 0
+
+    total = 0
+    stack = [grid]
+    while stack:
+        found, _, stack, _ = search(stack, 10**9, check)
+        total += found
+    return total
+
+def kernel_search(stack: list, limit: int = 1, check=None):
+    """ The search through the compiled kernel, with the same signature as _python_search.
+    """
+    return solver.search(stack, limit, check)
+
+@unittest.skipIf(solver._kernel is None, "the compiled kernel was not built")
+class TestKernelParity(unittest.TestCase):
+    """ Tests that the compiled kernel matches the pure Python search.
+    """
+
+    def test_count_and_first_solution(self):
+        """ Both searches find the same number of solutions and the same first solution, and
+        search the same number of nodes.
+        """
+        for grid in random_grids():
+            for limit in (1, 2, 5):
+                python = solver._python_search([grid], limit)
+                kernel = kernel_search([grid], limit)
+                self.assertEqual(python[:2], kernel[:2])
+                self.assertEqual(python[3], kernel[3])
+
+    def test_stack_of_grids(self):
+        """ Both searches call check on the same schedule across a stack of grids that each take
+        fewer than CHECK_INTERVAL nodes, and stop at the same place.
+        """
+        stack = [grid for grid in random_grids() if grid.size == 9][:20]
+        counts = []
+        for search in (solver._python_search, kernel_search):
+            checks = [0]
+
+            def check():
+                checks[0] += 1
+                return False
+
+            result = search(list(stack), 10**9, check)
+            counts.append((checks[0], result[0], result[1], result[3]))
+        self.assertGreaterEqual(counts[0][0], 2)
+        self.assertEqual(counts[0], counts[1])
+
+        stopped = []
+        for search in (solver._python_search, kernel_search):
+            checks = [0]
+
+            def check():
+                checks[0] += 1
+                return checks[0] == 2
+
+            stopped.append(search(list(stack), 10**9, check))
+        self.assertEqual(stopped[0], stopped[1])
+
+    def test_stop_and_resume(self):
+        """ Stopping and resuming either search counts the same solutions as the full search.
+        """
+        for grid in random_grids():
+            total = solver._python_search([grid], 2000)[0]
+            if total >= 2000:
+                continue
+            self.assertEqual(resume_total(solver._python_search, grid), total)
+            self.assertEqual(resume_total(kernel_search, grid), total)
+
+    def test_invalid_grid(self):
+        """ Both searches find no solution for a grid that repeats a value.
+        """
+        for grid in (Grid(4, bytes([1] * 16)), Grid(9).fork(0, 5).fork(80, 5).fork(8, 5)):
+            self.assertEqual(solver._python_search([grid], 2)[:2], (0, None))
+            self.assertEqual(kernel_search([grid], 2)[:2], (0, None))
+
+class TestPythonSearch(unittest.TestCase):
+    """ Tests for the pure Python search, which run without the kernel as well.
+    """
+
+    def test_solutions_are_valid(self):
+        """ The first solution fills every cell of the grid it was found for.
+        """
+        for grid in random_grids():
+            count, solution, _, _ = solver._python_search([grid], 1)
+            self.assertEqual(count, 1)
+            self.assertIsNone(solution.find_empty())
+            self.assertTrue(solution.valid())
+            for index in range(grid.geometry.cell_count):
+                if grid[index]:
+                    self.assertEqual(solution[index], grid[index])
+
+    def test_invalid_grid(self):
+        """ A grid that repeats a value has no solution.
+        """
+        self.assertEqual(solver.count_solutions(Grid(4, bytes([1] * 16)), 2), (0, None))
+
+if __name__ == "__main__":
+    unittest.main()